@@ -4,22 +4,40 @@ This script evaluates multiple prompts for PII extraction using Gemini API
 and calculates performance metrics for comparison.
 """
 
-import json
+import argparse
+import asyncio
+import hashlib
 import logging
+import os
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
+import diskcache
+import httpx
+import orjson
 from dotenv import load_dotenv
 import google.genai as genai
 from google.genai import types
+from pydantic import ValidationError
+from tqdm import tqdm
 
 from scripts.evaluation import calculate_pii_metrics, print_metrics_report
 from scripts.read_file import read_input_document
-from scripts.validator import validate_output
-from scripts.schema import PIIExtractionOutput
-from scripts.prompts import get_prompt
-from scripts.preprocess import clean_document_for_llm
+from scripts.schema import (
+    PII_BATCH_SCHEMA,
+    PII_SCHEMA,
+    PIIBatchExtractionOutput,
+    PIIExtractionOutput,
+)
+from scripts.prompts import get_prompt, batch_instruction
+from scripts.preprocess import clean_documents
+
+try:
+    import uvloop
+except ImportError:  # uvloop does not support Windows
+    uvloop = None
 
 # Configure logging
 logging.basicConfig(
@@ -29,55 +47,135 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# orjson options for result files: int prompt IDs as keys, numpy scalars in metrics
+_JSON_DUMP_OPTIONS = (
+    orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+)
+
+# Version of the stored prediction format, part of the response cache key and
+# the prediction stream name. Bump it when results are shaped differently, so
+# entries written by older code are not reused.
+_RESULT_FORMAT = 2
+
+# Terminal states of a Gemini batch job
+_BATCH_JOB_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
 
 class PIIEvaluationRunner:
     """Main class to run PII extraction evaluation across multiple prompts."""
 
-    def __init__(self, model_name: str = "gemini-2.5-flash"):
+    def __init__(
+        self,
+        model_name: str = "gemini-2.5-flash",
+        max_concurrency: int = 50,
+        batch_size: int = 1,
+    ):
         """Initialize the evaluation runner.
 
         Args:
             model_name: Name of the Gemini model to use
+            max_concurrency: Maximum number of Gemini requests in flight at once
+            batch_size: Number of documents packed into a single Gemini request
         """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
         load_dotenv()
-        self.client = genai.Client()
+        # HTTP/2 multiplexes the concurrent requests over a few pooled connections
+        self.client = genai.Client(
+            http_options=types.HttpOptions(
+                async_client_args={
+                    "http2": True,
+                    "limits": httpx.Limits(
+                        max_connections=max_concurrency,
+                        max_keepalive_connections=max_concurrency,
+                    ),
+                }
+            )
+        )
         self.model_name = model_name
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         self.results_dir = Path("results")
         self.results_dir.mkdir(exist_ok=True)
+        self.cache = diskcache.Cache(self.results_dir / "llm_cache")
+
+    def _generation_config(self, prompt_content: str) -> types.GenerateContentConfig:
+        """Build the single-document request config for a prompt."""
+        return types.GenerateContentConfig(
+            response_mime_type="application/json",
+            system_instruction=prompt_content,
+            response_json_schema=PII_SCHEMA,
+        )
 
-    def detect_pii(
+    def _batch_generation_config(
+        self, prompt_content: str
+    ) -> types.GenerateContentConfig:
+        """Build the multi-document request config for a prompt."""
+        return types.GenerateContentConfig(
+            response_mime_type="application/json",
+            system_instruction=prompt_content + batch_instruction,
+            response_json_schema=PII_BATCH_SCHEMA,
+        )
+
+    def _cache_key(self, prompt_content: str, clean_text: str) -> str:
+        """Build the response cache key for a (model, prompt, document) triple."""
+        return hashlib.blake2b(
+            f"{_RESULT_FORMAT}|{self.model_name}|{prompt_content}|{clean_text}".encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    async def detect_pii(
         self,
-        document_text: str,
+        clean_text: str,
         document_name: str,
         prompt_content: str,
         prompt_id: int,
+        config: Optional[types.GenerateContentConfig] = None,
     ) -> Dict[str, Any]:
         """Process a single document with the given prompt.
 
+        Successful responses are cached on disk, keyed by model, prompt content
+        and cleaned document text, so re-runs skip documents already processed.
+
         Args:
-            document_text: Raw document text to process
+            clean_text: Document text already passed through clean_document_for_llm
             document_name: Identifier for the document
             prompt_content: System prompt content
             prompt_id: ID of the prompt being tested
+            config: Prebuilt request config for ``prompt_content``; built on demand if omitted
 
         Returns:
             Dictionary containing processed results or error information
         """
-        try:
-            clean_text = clean_document_for_llm(document_text)
-
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=f"Input Text: {clean_text}",
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    system_instruction=prompt_content,
-                    response_json_schema=PIIExtractionOutput.model_json_schema(),
-                ),
-            )
+        if config is None:
+            config = self._generation_config(prompt_content)
 
-            validated_data = validate_output(response.text)
-            return validated_data
+        try:
+            cache_key = self._cache_key(prompt_content, clean_text)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug(
+                    f"♻️ Using cached result for document '{document_name}' with prompt {prompt_id}"
+                )
+                return cached
+
+            async with self._semaphore:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=f"Input Text: {clean_text}",
+                    config=config,
+                )
+
+            result = self._parse_response(response.text)
+            if result.get("status") != "error":
+                self.cache.set(cache_key, result)
+            return result
 
         except Exception as e:
             logger.error(
@@ -85,81 +183,614 @@ class PIIEvaluationRunner:
             )
             return {"error": str(e), "status": "error"}
 
-    def run_prompt_evaluation(
-        self, prompt_id: int, documents_df, ground_truth: Dict[str, Any]
+    def _parse_response(self, response_text: str) -> Dict[str, Any]:
+        """Decode and normalise a single-document model response.
+
+        The JSON is parsed once with orjson and the resulting dict is validated
+        against PIIExtractionOutput, so every prediction carries all twelve
+        categories as lists of strings and unknown keys are dropped, the same
+        shape the batched path produces.
+
+        Args:
+            response_text: Raw JSON text returned by the model
+
+        Returns:
+            Dictionary of extracted PII, or error information if decoding or
+            validation failed
+        """
+        try:
+            decoded = orjson.loads(response_text)
+        except orjson.JSONDecodeError as e:
+            logger.error(f"❌ Model returned invalid JSON: {e}")
+            return {"error": f"Invalid JSON response: {e}", "status": "error"}
+
+        try:
+            return PIIExtractionOutput.model_validate(decoded).model_dump()
+        except ValidationError as e:
+            logger.error(f"❌ Response failed schema validation: {e}")
+            return {"error": f"Response failed schema validation: {e}", "status": "error"}
+
+    async def detect_pii_batch(
+        self,
+        documents: List[Tuple[str, str]],
+        prompt_content: str,
+        prompt_id: int,
+        config: Optional[types.GenerateContentConfig] = None,
+        batch_config: Optional[types.GenerateContentConfig] = None,
+    ) -> Dict[str, Any]:
+        """Process several documents with the given prompt in a single request.
+
+        Each document is tagged with a ``[[DOC_n]]`` marker and the model returns
+        one extraction per marker. Documents are looked up in the response cache
+        first and only the misses are sent; a single-document batch, or a batch
+        with a single miss, is sent through ``detect_pii`` so that
+        ``batch_size=1`` keeps the per-document requests.
+
+        Args:
+            documents: List of (document_name, clean_text) pairs
+            prompt_content: System prompt content
+            prompt_id: ID of the prompt being tested
+            config: Prebuilt single-document request config for ``prompt_content``
+            batch_config: Prebuilt multi-document request config for ``prompt_content``;
+                built on demand if omitted
+
+        Returns:
+            Dictionary mapping document names to processed results or error information
+        """
+        if len(documents) == 1:
+            document_name, clean_text = documents[0]
+            return {
+                document_name: await self.detect_pii(
+                    clean_text=clean_text,
+                    document_name=document_name,
+                    prompt_content=prompt_content,
+                    prompt_id=prompt_id,
+                    config=config,
+                )
+            }
+
+        results, misses = self._split_cached(documents, prompt_content, prompt_id)
+        if len(misses) == 1:
+            document_name, clean_text = misses[0]
+            results[document_name] = await self.detect_pii(
+                clean_text=clean_text,
+                document_name=document_name,
+                prompt_content=prompt_content,
+                prompt_id=prompt_id,
+                config=config,
+            )
+        elif misses:
+            results.update(
+                await self._send_batch(misses, prompt_content, prompt_id, batch_config)
+            )
+        return results
+
+    def _split_cached(
+        self,
+        documents: List[Tuple[str, str]],
+        prompt_content: str,
+        prompt_id: int,
+    ) -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+        """Look up every document in the response cache.
+
+        Args:
+            documents: List of (document_name, clean_text) pairs
+            prompt_content: System prompt content
+            prompt_id: ID of the prompt being tested
+
+        Returns:
+            Tuple of (cached results keyed by document name, documents not in the cache)
+        """
+        results = {}
+        misses = []
+        for document_name, clean_text in documents:
+            cached = self.cache.get(self._cache_key(prompt_content, clean_text))
+            if cached is None:
+                misses.append((document_name, clean_text))
+                continue
+            logger.debug(
+                f"♻️ Using cached result for document '{document_name}' with prompt {prompt_id}"
+            )
+            results[document_name] = cached
+        return results, misses
+
+    async def _send_batch(
+        self,
+        documents: List[Tuple[str, str]],
+        prompt_content: str,
+        prompt_id: int,
+        batch_config: Optional[types.GenerateContentConfig] = None,
+    ) -> Dict[str, Any]:
+        """Send several documents in one multi-document request.
+
+        Successful per-document results are written to the response cache.
+
+        Args:
+            documents: List of (document_name, clean_text) pairs
+            prompt_content: System prompt content
+            prompt_id: ID of the prompt being tested
+            batch_config: Prebuilt multi-document request config for ``prompt_content``;
+                built on demand if omitted
+
+        Returns:
+            Dictionary mapping document names to processed results or error information
+        """
+        if batch_config is None:
+            batch_config = self._batch_generation_config(prompt_content)
+
+        doc_ids = {f"DOC_{i}": name for i, (name, _) in enumerate(documents, start=1)}
+        document_names = ", ".join(doc_ids.values())
+
+        try:
+            contents = "Documents:\n" + "\n".join(
+                f"[[{doc_id}]] {clean_text}"
+                for doc_id, (_, clean_text) in zip(doc_ids, documents)
+            )
+
+            async with self._semaphore:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=contents,
+                    config=batch_config,
+                )
+
+            batch_output = PIIBatchExtractionOutput.model_validate_json(response.text)
+            extracted = {
+                entry.document_id: entry.pii.model_dump()
+                for entry in batch_output.documents
+            }
+
+        except Exception as e:
+            logger.error(
+                f"❌ Error processing documents '{document_names}' with prompt {prompt_id}: {e}"
+            )
+            return {name: {"error": str(e), "status": "error"} for name in doc_ids.values()}
+
+        results = {}
+        for (doc_id, document_name), (_, clean_text) in zip(doc_ids.items(), documents):
+            if doc_id in extracted:
+                results[document_name] = extracted[doc_id]
+                self.cache.set(
+                    self._cache_key(prompt_content, clean_text), extracted[doc_id]
+                )
+            else:
+                logger.warning(
+                    f"⚠️ Document '{document_name}' missing from batch response for prompt {prompt_id}"
+                )
+                results[document_name] = {
+                    "error": "Document missing from batch response",
+                    "status": "error",
+                }
+        return results
+
+    async def run_prompt_evaluation(
+        self,
+        prompt_id: int,
+        documents: List[Tuple[str, str]],
+        ground_truth: Dict[str, Any],
     ) -> Optional[Dict[str, Any]]:
         """Run evaluation for a single prompt across all documents.
 
         Args:
             prompt_id: ID of the prompt to evaluate
-            documents_df: DataFrame containing documents
+            documents: List of (document_name, clean_text) pairs
             ground_truth: Ground truth data for evaluation
 
         Returns:
             Dictionary containing evaluation results or None if failed
         """
-        logger.info(f"\n{'='*60}")
-        logger.info(f"🔄 Processing with Prompt ID: {prompt_id}")
-        logger.info(f"{'='*60}")
+        all_results = await self.run_all_evaluations(
+            prompt_ids=[prompt_id], documents=documents, ground_truth=ground_truth
+        )
+        return all_results.get(prompt_id)
 
-        predictions = {}
-        prompt_content = get_prompt(prompt_id)
+    async def run_all_evaluations(
+        self,
+        prompt_ids: List[int],
+        documents: List[Tuple[str, str]],
+        ground_truth: Dict[str, Any],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Run the evaluation for every prompt in ``prompt_ids``.
+
+        Documents are grouped into batches of ``batch_size`` and every
+        (prompt, batch) pair is sent to Gemini concurrently; the number of
+        requests in flight is bounded by the runner's semaphore. Predictions
+        are then saved and scored per prompt.
+
+        Successful predictions are appended to
+        ``predictions_prompt_<id>_<digest>.jsonl`` as they arrive, where the
+        digest covers the model and prompt content. If a run is interrupted, the
+        next run with the same model and prompt resumes from that file and only
+        queues the documents it does not contain yet.
+
+        Args:
+            prompt_ids: IDs of the prompts to evaluate
+            documents: List of (document_name, clean_text) pairs
+            ground_truth: Ground truth data for evaluation
+
+        Returns:
+            Dictionary mapping prompt IDs to their evaluation results
+        """
+        prompt_contents = {prompt_id: get_prompt(prompt_id) for prompt_id in prompt_ids}
+        unique_documents, duplicates = self._deduplicate_documents(documents)
+        predictions_by_prompt = {}
+
+        with ExitStack() as stack:
+            progress = stack.enter_context(tqdm(total=0, desc="Extracting PII", unit="doc"))
+
+            # Queue every (prompt, batch) pair not already streamed by an earlier run
+            pairs = []
+            tasks = []
+            for prompt_id, prompt_content in prompt_contents.items():
+                logger.info(f"\n{'='*60}")
+                logger.info(f"🔄 Processing with Prompt ID: {prompt_id}")
+                logger.info(f"{'='*60}")
+
+                stream_file = self._stream_file(prompt_id, prompt_content)
+                predictions_by_prompt[prompt_id] = self._load_streamed_predictions(
+                    stream_file
+                )
+                stream = stack.enter_context(open(stream_file, "ab"))
+
+                config = self._generation_config(prompt_content)
+                batch_config = self._batch_generation_config(prompt_content)
+                pending = [
+                    (document_name, clean_text)
+                    for document_name, clean_text in unique_documents
+                    if document_name not in predictions_by_prompt[prompt_id]
+                ]
+                progress.total += len(pending)
+
+                for start in range(0, len(pending), self.batch_size):
+                    batch = pending[start : start + self.batch_size]
+                    pairs.append((prompt_id, [name for name, _ in batch]))
+                    tasks.append(
+                        self._detect_and_stream(
+                            stream=stream,
+                            progress=progress,
+                            documents=batch,
+                            prompt_content=prompt_content,
+                            prompt_id=prompt_id,
+                            config=config,
+                            batch_config=batch_config,
+                        )
+                    )
 
-        # Process all documents
-        for i in range(documents_df.shape[0]):
-            document_name = documents_df["name"].iloc[i]
-            document_text = documents_df["content"].iloc[i]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
 
+        for (prompt_id, document_names), result in zip(pairs, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    f"❌ Error processing documents '{', '.join(document_names)}' with prompt {prompt_id}: {result}"
+                )
+                result = {
+                    name: {"error": str(result), "status": "error"}
+                    for name in document_names
+                }
+            predictions_by_prompt[prompt_id].update(result)
+
+        self._copy_duplicate_predictions(predictions_by_prompt, duplicates)
+        return self._evaluate_predictions(
+            predictions_by_prompt, prompt_contents, ground_truth
+        )
+
+    async def _detect_and_stream(
+        self,
+        stream,
+        progress: tqdm,
+        documents: List[Tuple[str, str]],
+        prompt_content: str,
+        prompt_id: int,
+        config: types.GenerateContentConfig,
+        batch_config: types.GenerateContentConfig,
+    ) -> Dict[str, Any]:
+        """Run ``detect_pii_batch`` and append its successful results to ``stream``.
+
+        Args:
+            stream: Binary file object of the prompt's JSON-Lines prediction stream
+            progress: Progress bar advanced by the number of documents in the batch
+            documents: List of (document_name, clean_text) pairs
+            prompt_content: System prompt content
+            prompt_id: ID of the prompt being tested
+            config: Prebuilt single-document request config for ``prompt_content``
+            batch_config: Prebuilt multi-document request config for ``prompt_content``
+
+        Returns:
+            Dictionary mapping document names to processed results or error information
+        """
+        results = await self.detect_pii_batch(
+            documents=documents,
+            prompt_content=prompt_content,
+            prompt_id=prompt_id,
+            config=config,
+            batch_config=batch_config,
+        )
+
+        for document_name, result in results.items():
+            # Failed documents are not streamed so that a resumed run retries them
+            if result.get("status") == "error":
+                continue
+            stream.write(orjson.dumps({"name": document_name, "result": result}) + b"\n")
+        stream.flush()
+        progress.update(len(documents))
+
+        return results
+
+    def _stream_file(self, prompt_id: int, prompt_content: str) -> Path:
+        """Path of the JSON-Lines file predictions for a prompt are streamed to.
+
+        The name carries a digest of the model and prompt content, so a run
+        never resumes from predictions made with a different model or prompt text.
+        """
+        digest = hashlib.blake2b(
+            f"{_RESULT_FORMAT}|{self.model_name}|{prompt_content}".encode(),
+            digest_size=8,
+        ).hexdigest()
+        return self.results_dir / f"predictions_prompt_{prompt_id}_{digest}.jsonl"
+
+    def _load_streamed_predictions(self, stream_file: Path) -> Dict[str, Any]:
+        """Load predictions streamed to ``stream_file`` by an interrupted run.
+
+        Args:
+            stream_file: Path of the JSON-Lines prediction stream
+
+        Returns:
+            Dictionary mapping document names to their streamed results
+        """
+        if not stream_file.exists():
+            return {}
+
+        data = stream_file.read_bytes()
+        if not data.endswith(b"\n"):
+            # Drop a record truncated by a killed run so new records start on a fresh line
+            data = data[: data.rfind(b"\n") + 1]
+            stream_file.write_bytes(data)
+
+        predictions = {}
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+                predictions[record["name"]] = record["result"]
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                logger.warning(f"⚠️ Skipping malformed line in {stream_file}")
+
+        if predictions:
             logger.info(
-                f"✅ Prompt {prompt_id} - Document {i+1}/{documents_df.shape[0]} - {document_name}"
+                f"♻️ Resuming from {stream_file}: {len(predictions)} documents already processed"
             )
+        return predictions
 
-            result = self.detect_pii(
-                document_text=document_text,
-                document_name=document_name,
-                prompt_content=prompt_content,
-                prompt_id=prompt_id,
+    async def run_batch_mode_evaluation(
+        self,
+        prompt_ids: List[int],
+        documents: List[Tuple[str, str]],
+        ground_truth: Dict[str, Any],
+        poll_interval: float = 30.0,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Run the evaluation for every prompt through the Gemini Batch Mode API.
+
+        All (prompt, document) requests not already in the response cache are
+        submitted as one inline batch job, which is billed at a discount and not
+        subject to the interactive rate limits. The job is polled until it finishes; results are then saved
+        and scored per prompt exactly as in ``run_all_evaluations``.
+
+        Args:
+            prompt_ids: IDs of the prompts to evaluate
+            documents: List of (document_name, clean_text) pairs
+            ground_truth: Ground truth data for evaluation
+            poll_interval: Seconds to wait between batch job status checks
+
+        Returns:
+            Dictionary mapping prompt IDs to their evaluation results
+        """
+        prompt_contents = {prompt_id: get_prompt(prompt_id) for prompt_id in prompt_ids}
+        unique_documents, duplicates = self._deduplicate_documents(documents)
+
+        # Cached (prompt, document) pairs are not resubmitted
+        predictions_by_prompt = {}
+        pairs = []
+        inline_requests = []
+        for prompt_id, prompt_content in prompt_contents.items():
+            config = self._generation_config(prompt_content)
+            predictions_by_prompt[prompt_id], misses = self._split_cached(
+                unique_documents, prompt_content, prompt_id
             )
+            for document_name, clean_text in misses:
+                pairs.append(
+                    (prompt_id, document_name, self._cache_key(prompt_content, clean_text))
+                )
+                inline_requests.append(
+                    types.InlinedRequest(
+                        contents=f"Input Text: {clean_text}", config=config
+                    )
+                )
 
-            predictions[document_name] = result
+        if inline_requests and not await self._run_batch_job(
+            inline_requests, pairs, predictions_by_prompt, poll_interval
+        ):
+            return {}
 
-        # Save predictions
-        if not self._save_predictions(predictions, prompt_id):
-            return None
+        self._copy_duplicate_predictions(predictions_by_prompt, duplicates)
+        return self._evaluate_predictions(
+            predictions_by_prompt, prompt_contents, ground_truth
+        )
 
-        # Calculate and save metrics
-        return self._calculate_and_save_metrics(
-            predictions, ground_truth, prompt_id, prompt_content
+    async def _run_batch_job(
+        self,
+        inline_requests: List[types.InlinedRequest],
+        pairs: List[Tuple[int, str, str]],
+        predictions_by_prompt: Dict[int, Dict[str, Any]],
+        poll_interval: float = 30.0,
+    ) -> bool:
+        """Submit an inline batch job, wait for it and collect its results.
+
+        Successful results are written to the response cache.
+
+        Args:
+            inline_requests: Requests to submit, one per entry of ``pairs``
+            pairs: (prompt_id, document_name, cache_key) for each request
+            predictions_by_prompt: Predictions keyed by prompt ID, then document
+                name; updated in place
+            poll_interval: Seconds to wait between batch job status checks
+
+        Returns:
+            True if the job succeeded, False if it ended in any other state
+        """
+        display_name = f"pii-eval-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        batch_job = await self.client.aio.batches.create(
+            model=self.model_name,
+            src=inline_requests,
+            config=types.CreateBatchJobConfig(display_name=display_name),
         )
+        logger.info(
+            f"🚀 Submitted batch job {batch_job.name} with {len(inline_requests)} requests"
+        )
+
+        state = self._batch_job_state(batch_job)
+        while state not in _BATCH_JOB_DONE_STATES:
+            await asyncio.sleep(poll_interval)
+            batch_job = await self.client.aio.batches.get(name=batch_job.name)
+            state = self._batch_job_state(batch_job)
+            logger.info(f"⏳ Batch job {batch_job.name}: {state}")
+
+        if state != "JOB_STATE_SUCCEEDED":
+            logger.error(
+                f"❌ Batch job {batch_job.name} ended with state {state}: {batch_job.error}"
+            )
+            return False
+
+        inlined_responses = (
+            batch_job.dest.inlined_responses if batch_job.dest is not None else None
+        ) or []
+        if len(inlined_responses) != len(pairs):
+            # Responses cannot be matched to requests by position any more
+            message = (
+                f"Batch job returned {len(inlined_responses)} responses "
+                f"for {len(pairs)} requests"
+            )
+            logger.error(f"❌ Batch job {batch_job.name}: {message}")
+            for prompt_id, document_name, _ in pairs:
+                predictions_by_prompt[prompt_id][document_name] = {
+                    "error": message,
+                    "status": "error",
+                }
+            return True
 
+        for (prompt_id, document_name, cache_key), inline_response in zip(
+            pairs, inlined_responses
+        ):
+            response = inline_response.response
+            if inline_response.error or response is None or response.text is None:
+                error = inline_response.error or "Batch response has no content"
+                logger.error(
+                    f"❌ Error processing document '{document_name}' with prompt {prompt_id}: {error}"
+                )
+                result = {"error": str(error), "status": "error"}
+            else:
+                result = self._parse_response(response.text)
+                if result.get("status") != "error":
+                    self.cache.set(cache_key, result)
+            predictions_by_prompt[prompt_id][document_name] = result
+
+        return True
+
+    @staticmethod
+    def _batch_job_state(batch_job: types.BatchJob) -> str:
+        """Name of a batch job's state; a job without one yet is still pending."""
+        if batch_job.state is None:
+            return "JOB_STATE_PENDING"
+        return batch_job.state.name
+
+    @staticmethod
+    def _deduplicate_documents(
+        documents: List[Tuple[str, str]],
+    ) -> Tuple[List[Tuple[str, str]], Dict[str, str]]:
+        """Drop documents whose cleaned text repeats an earlier document.
 
-    def _save_predictions(self, predictions: Dict[str, Any], prompt_id: int) -> bool:
+        Args:
+            documents: List of (document_name, clean_text) pairs
+
+        Returns:
+            Tuple of (unique documents, mapping of duplicate name to the name of
+            the first document with the same text)
         """
-        Save predictions to JSON file with clean formatting.
-        Automatically converts JSON strings into real dictionaries.
+        first_by_digest = {}
+        unique_documents = []
+        duplicates = {}
+
+        for document_name, clean_text in documents:
+            digest = hashlib.blake2b(clean_text.encode(), digest_size=16).digest()
+            if digest in first_by_digest:
+                duplicates[document_name] = first_by_digest[digest]
+                continue
+            first_by_digest[digest] = document_name
+            unique_documents.append((document_name, clean_text))
+
+        if duplicates:
+            logger.info(
+                f"♻️ {len(duplicates)} duplicate documents will reuse earlier predictions"
+            )
+        return unique_documents, duplicates
+
+    @staticmethod
+    def _copy_duplicate_predictions(
+        predictions_by_prompt: Dict[int, Dict[str, Any]], duplicates: Dict[str, str]
+    ) -> None:
+        """Give every duplicate document the prediction of its original."""
+        for predictions in predictions_by_prompt.values():
+            for duplicate_name, original_name in duplicates.items():
+                if original_name in predictions:
+                    predictions[duplicate_name] = predictions[original_name]
+
+    def _evaluate_predictions(
+        self,
+        predictions_by_prompt: Dict[int, Dict[str, Any]],
+        prompt_contents: Dict[int, str],
+        ground_truth: Dict[str, Any],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Save predictions and calculate metrics for each prompt.
+
+        Args:
+            predictions_by_prompt: Predictions keyed by prompt ID, then document name
+            prompt_contents: Prompt content keyed by prompt ID
+            ground_truth: Ground truth data for evaluation
+
+        Returns:
+            Dictionary mapping prompt IDs to their evaluation results
         """
+        all_results = {}
+        for prompt_id, predictions in predictions_by_prompt.items():
+            # Save predictions
+            if not self._save_predictions(
+                predictions, prompt_id, prompt_contents[prompt_id]
+            ):
+                continue
+
+            # Calculate and save metrics
+            results = self._calculate_and_save_metrics(
+                predictions, ground_truth, prompt_id, prompt_contents[prompt_id]
+            )
 
-        # Fix: convert stringified JSON to proper dicts
-        cleaned = {}
-
-        for key, value in predictions.items():
-            if isinstance(value, str):
-                # Value *is* raw JSON in string form
-                try:
-                    cleaned[key] = json.loads(value)
-                except json.JSONDecodeError:
-                    logger.warning(
-                        f"⚠️ Failed to decode JSON for key: {key}. Keeping original string."
-                    )
-                    cleaned[key] = value
-            else:
-                cleaned[key] = value
+            if results:
+                all_results[prompt_id] = results
 
+        return all_results
+
+    def _save_predictions(
+        self, predictions: Dict[str, Any], prompt_id: int, prompt_content: str
+    ) -> bool:
+        """
+        Save predictions to JSON file with clean formatting, then remove the
+        prompt's partial prediction stream.
+        """
         output_file = self.results_dir / f"predictions_prompt_{prompt_id}.json"
 
         try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(cleaned, f, indent=4, ensure_ascii=False)
+            save_json(output_file, predictions)
+            # The complete predictions file supersedes any partial stream
+            self._stream_file(prompt_id, prompt_content).unlink(missing_ok=True)
             logger.info(f"✅ Successfully saved predictions for prompt {prompt_id}")
             return True
 
@@ -186,28 +817,15 @@ class PIIEvaluationRunner:
             Dictionary containing metrics and results
         """
         try:
-            # Clean and filter predictions: parse JSON strings and filter out errors
+            # Filter out documents that failed
             successful_predictions = {}
-            
+
             for doc_name, result in predictions.items():
-                # Skip error cases
-                if result is None or (isinstance(result, dict) and result.get("status") == "error"):
+                if result.get("status") == "error":
                     logger.warning(f"⚠️ Skipping document '{doc_name}' due to error status")
                     continue
-                
-                # Parse JSON strings to dictionaries
-                if isinstance(result, str):
-                    try:
-                        parsed_result = json.loads(result)
-                        successful_predictions[doc_name] = parsed_result
-                    except json.JSONDecodeError:
-                        logger.warning(f"⚠️ Failed to parse JSON for document '{doc_name}'. Skipping.")
-                        continue
-                elif isinstance(result, dict):
-                    successful_predictions[doc_name] = result
-                else:
-                    logger.warning(f"⚠️ Unexpected result type for document '{doc_name}': {type(result)}. Skipping.")
-                    continue
+
+                successful_predictions[doc_name] = result
 
             if not successful_predictions:
                 logger.error(f"❌ No valid predictions found for prompt {prompt_id}")
@@ -230,8 +848,7 @@ class PIIEvaluationRunner:
 
             # Save metrics
             metrics_file = self.results_dir / f"metrics_prompt_{prompt_id}.json"
-            with open(metrics_file, "w", encoding="utf-8") as f:
-                json.dump(metrics_data, f, indent=4, ensure_ascii=False)
+            save_json(metrics_file, metrics_data)
 
             logger.info(f"✅ Successfully saved metrics for prompt {prompt_id}")
 
@@ -255,14 +872,14 @@ class PIIEvaluationRunner:
         self,
         all_results: Dict[int, Dict[str, Any]],
         prompt_ids: List[int],
-        documents_df,
+        total_documents: int,
     ) -> bool:
         """Save comprehensive comparison of all prompts.
 
         Args:
             all_results: Dictionary containing results for all prompts
             prompt_ids: List of prompt IDs that were tested
-            documents_df: DataFrame containing processed documents
+            total_documents: Number of documents evaluated
 
         Returns:
             True if successful, False otherwise
@@ -275,7 +892,7 @@ class PIIEvaluationRunner:
                     "generated_at": datetime.now().isoformat(),
                     "total_prompts_tested": len(prompt_ids),
                     "model_used": self.model_name,
-                    "total_documents": documents_df.shape[0],
+                    "total_documents": total_documents,
                 },
                 "prompts_comparison": {},
             }
@@ -291,8 +908,7 @@ class PIIEvaluationRunner:
                     "total_documents_processed": len(results["predictions"]),
                 }
 
-            with open(comparison_file, "w", encoding="utf-8") as f:
-                json.dump(comparison_data, f, indent=4, ensure_ascii=False)
+            save_json(comparison_file, comparison_data)
 
             logger.info(f"✅ Successfully saved comprehensive comparison")
             return True
@@ -324,6 +940,21 @@ class PIIEvaluationRunner:
         logger.info(f"{'='*60}")
 
 
+def save_json(output_path: Path, data: Any) -> None:
+    """Write data to a JSON file atomically.
+
+    The JSON is written to a temporary file next to ``output_path`` and then
+    moved into place, so an interrupted run never leaves a truncated file.
+
+    Args:
+        output_path: Destination JSON file
+        data: JSON-serializable data to write
+    """
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(data, option=_JSON_DUMP_OPTIONS))
+    os.replace(tmp_path, output_path)
+
+
 def load_ground_truth(ground_truth_path: str) -> Dict[str, Any]:
     """Load ground truth data from JSON file.
 
@@ -341,47 +972,72 @@ def load_ground_truth(ground_truth_path: str) -> Dict[str, Any]:
     if not ground_truth_path.exists():
         raise FileNotFoundError(f"Ground truth file not found: {ground_truth_path}")
 
-    with open(ground_truth_path, "r") as file:
-        return json.load(file)
+    return orjson.loads(ground_truth_path.read_bytes())
+
 
+def main(
+    prompt_ids: Optional[List[int]] = None,
+    batch_size: int = 1,
+    use_batch_mode: bool = False,
+):
+    """Main execution function.
 
-def main():
-    """Main execution function."""
+    Args:
+        prompt_ids: IDs of the prompts to evaluate (default: [6])
+        batch_size: Documents per Gemini request (e.g. sweep 1, 2, 4, 8)
+        use_batch_mode: Submit through the Gemini Batch Mode API (cheaper, slower)
+    """
     # Configuration
     INPUT_FILE_PATH = "data/documents.xlsx"
     GROUND_TRUTH_FILE = "data/parsed_data.json"
-    PROMPT_IDS = [6]  # Adjust based on available prompts
+    if prompt_ids is None:
+        prompt_ids = [6]
 
     try:
         # Initialize evaluation runner
-        evaluator = PIIEvaluationRunner()
+        evaluator = PIIEvaluationRunner(batch_size=batch_size)
 
         # Load data
         logger.info("📂 Loading input documents...")
-        raw_text_df = read_input_document(file_path=INPUT_FILE_PATH)
+        raw_documents = read_input_document(file_path=INPUT_FILE_PATH)
+        if not raw_documents:
+            raise ValueError(f"No documents could be read from {INPUT_FILE_PATH}")
+
+        # Clean every document once; the cleaned text is shared by all prompts
+        documents = list(
+            zip(
+                [name for name, _ in raw_documents],
+                clean_documents([content for _, content in raw_documents]),
+            )
+        )
 
         logger.info("📂 Loading ground truth data...")
         ground_truth = load_ground_truth(GROUND_TRUTH_FILE)
 
         # Run evaluation for each prompt
-        all_results = {}
-
-        for prompt_id in PROMPT_IDS:
-            results = evaluator.run_prompt_evaluation(
-                prompt_id=prompt_id, documents_df=raw_text_df, ground_truth=ground_truth
+        run_evaluations = (
+            evaluator.run_batch_mode_evaluation
+            if use_batch_mode
+            else evaluator.run_all_evaluations
+        )
+        # Use the libuv event loop when available
+        run = uvloop.run if uvloop is not None else asyncio.run
+        all_results = run(
+            run_evaluations(
+                prompt_ids=prompt_ids, documents=documents, ground_truth=ground_truth
             )
-
-            if results:
-                all_results[prompt_id] = results
+        )
 
         # Save comprehensive comparison
         if all_results:
             evaluator.save_comprehensive_comparison(
-                all_results=all_results, prompt_ids=PROMPT_IDS, documents_df=raw_text_df
+                all_results=all_results,
+                prompt_ids=prompt_ids,
+                total_documents=len(documents),
             )
 
         # Print final summary
-        evaluator.print_final_summary(prompt_ids=PROMPT_IDS, all_results=all_results)
+        evaluator.print_final_summary(prompt_ids=prompt_ids, all_results=all_results)
 
     except Exception as e:
         logger.critical(f"💥 Critical error in main execution: {e}")
@@ -389,4 +1045,42 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Evaluate PII extraction prompts against the ground truth.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python main.py
+  python main.py --prompts 4 5 6 --batch-size 4
+  python main.py --prompts 0 1 2 3 4 5 6 --batch-mode
+        """,
+    )
+
+    parser.add_argument(
+        "--prompts",
+        type=int,
+        nargs="+",
+        default=[6],
+        help="IDs of the prompts to evaluate (default: 6).",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of documents sent per Gemini request (default: 1).",
+    )
+
+    parser.add_argument(
+        "--batch-mode",
+        action="store_true",
+        help="Submit all requests as one Gemini Batch Mode job (cheaper, slower).",
+    )
+
+    args = parser.parse_args()
+
+    main(
+        prompt_ids=args.prompts,
+        batch_size=args.batch_size,
+        use_batch_mode=args.batch_mode,
+    )
@@ -1,15 +1,15 @@
 import argparse
-import json
 import logging
 import re
-from collections import defaultdict
+from contextlib import closing
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
-import pandas as pd
+import orjson
 
 from scripts.preprocess import clean_document_for_llm
-from scripts.read_file import read_input_document
+from scripts.read_file import iter_input_documents
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +18,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class _FindAllAutomaton:
+    """
+    Stand-in for ``ahocorasick.Automaton`` when pyahocorasick is unavailable.
+
+    Reports every occurrence of every value, overlapping ones included, the
+    same hits Automaton.iter yields, by scanning the text with str.find once
+    per value.
+    """
+
+    def __init__(self) -> None:
+        self._payloads: Dict[str, Tuple[int, int, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def exists(self, key: str) -> bool:
+        return key in self._payloads
+
+    def add_word(self, key: str, payload: Tuple[int, int, str, str]) -> bool:
+        self._payloads[key] = payload
+        return True
+
+    def make_automaton(self) -> None:
+        pass
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Tuple[int, int, str, str]]]:
+        for key, payload in self._payloads.items():
+            start = text.find(key)
+            while start != -1:
+                yield start + len(key) - 1, payload
+                start = text.find(key, start + 1)
+
 
 def load_prompt_data(prompt_path: str) -> Dict:
     """
@@ -31,43 +69,50 @@ def load_prompt_data(prompt_path: str) -> Dict:
 
     Raises:
         FileNotFoundError: If the prompt file doesn't exist.
-        json.JSONDecodeError: If the file is not valid JSON.
+        ValueError: If the file is not valid JSON.
     """
     prompt_path_obj = Path(prompt_path)
     if not prompt_path_obj.exists():
         raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
 
     try:
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            prompt_data = json.load(f)
+        prompt_data = orjson.loads(prompt_path_obj.read_bytes())
         logger.info(f"Successfully loaded prompt data from {prompt_path}")
         return prompt_data
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in prompt file: {e}")
 
 
 def validate_inputs(
     document_name: str,
-    documents_df: pd.DataFrame,
+    documents: Iterable[Tuple[str, str]],
     prompt_data: Dict,
-) -> None:
+) -> str:
     """
     Validate that all required inputs are present and correct.
 
     Args:
         document_name: Name of the document to process.
-        documents_df: DataFrame containing documents.
+        documents: (name, content) document rows. Consumed only up to the
+            first row with a matching name.
         prompt_data: Dictionary containing prompt/redaction data.
 
+    Returns:
+        Raw content of the requested document.
+
     Raises:
         ValueError: If validation fails.
     """
-    if documents_df is None or documents_df.empty:
-        raise ValueError("Input document dataset is empty or could not be loaded.")
-
-    doc_row = documents_df[documents_df["name"] == document_name]
-    if doc_row.empty:
-        available_docs = ", ".join(documents_df["name"].unique().tolist())
+    available_docs = []
+    for name, content in documents:
+        if name == document_name:
+            document_text = content
+            break
+        available_docs.append(name)
+    else:
+        if not available_docs:
+            raise ValueError("Input document dataset is empty or could not be loaded.")
+        available_docs = ", ".join(map(str, dict.fromkeys(available_docs)))
         raise ValueError(
             f"Document '{document_name}' not found. "
             f"Available documents: {available_docs}"
@@ -80,22 +125,52 @@ def validate_inputs(
             f"Available documents: {available_docs}"
         )
 
+    return document_text
+
+
+def _fold_case(text: str) -> str:
+    """
+    Lowercase text without changing its length, so offsets found in the
+    folded text can be applied to the original.
+
+    Args:
+        text: Text to fold.
+
+    Returns:
+        Lowercased text of the same length as the input.
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # A few characters (e.g. "İ") lowercase to two code points; keep those as-is
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
 
 def prepare_redaction_patterns(
     prompt_config: Dict[str, List[str]],
-) -> List[Tuple[str, str, int]]:
+    case_sensitive: bool = False,
+) -> "ahocorasick.Automaton":
     """
-    Prepare redaction patterns sorted by length (longest first) to handle
-    overlapping matches correctly.
+    Build an Aho-Corasick automaton over every PII value so that all of
+    them can be located in a single pass over the document. Falls back to
+    a str.find scan per value when pyahocorasick is not installed.
+
+    Automata are memoised on the (category, values) content of the config,
+    so repeated calls with an unchanged prompt skip the build entirely.
+    The returned automaton is shared between such calls and must not be
+    modified.
 
     Args:
         prompt_config: Dictionary mapping PII categories to lists of values.
+        case_sensitive: Whether the automaton should match case-sensitively.
+            When False, values are lowercased and the text is lowercased once
+            before scanning, instead of folding case on every comparison.
 
     Returns:
-        List of tuples (pattern, mask, length) sorted by length descending.
+        Automaton whose payloads are (length, order, mask, value) tuples,
+        order being the position of the value in the config.
     """
-    patterns = []
-
+    frozen_config = []
     for category, values in prompt_config.items():
         if not isinstance(values, list):
             logger.warning(
@@ -103,55 +178,157 @@ def prepare_redaction_patterns(
             )
             continue
 
+        frozen_config.append(
+            (
+                category,
+                tuple(value for value in values if value and isinstance(value, str)),
+            )
+        )
+
+    automaton = _build_automaton(tuple(frozen_config), case_sensitive)
+    logger.info(f"Prepared {len(automaton)} redaction patterns")
+    return automaton
+
+
+@lru_cache(maxsize=128)
+def _build_automaton(
+    frozen_config: Tuple[Tuple[str, Tuple[str, ...]], ...],
+    case_sensitive: bool,
+) -> "ahocorasick.Automaton":
+    """
+    Build the automaton for prepare_redaction_patterns from a hashable
+    ((category, values), ...) snapshot of the prompt config.
+
+    Args:
+        frozen_config: Categories paired with their valid string values.
+        case_sensitive: Whether the automaton should match case-sensitively.
+
+    Returns:
+        Automaton whose payloads are (length, order, mask, value) tuples,
+        order being the position of the value in the config.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+    else:
+        automaton = _FindAllAutomaton()
+
+    for category, values in frozen_config:
         mask = f"<{category}_REDACTED>"
 
         for value in values:
-            if not value or not isinstance(value, str):
+            key = value if case_sensitive else _fold_case(value)
+            # First category listed wins when the same value appears twice
+            if automaton.exists(key):
                 continue
+            automaton.add_word(key, (len(key), len(automaton), mask, value))
+
+    if len(automaton):
+        automaton.make_automaton()
+
+    return automaton
+
+
+def _resolve_spans(
+    hits: Iterable[Tuple[int, Tuple[int, int, str, str]]],
+    text_length: int,
+) -> Tuple[List[Tuple[int, int, str]], Dict[str, int]]:
+    """
+    Turn raw automaton hits into non-overlapping spans the way substituting
+    the values one after another, longest first, would: longer values claim
+    their text first (values listed earlier first among equal lengths, then
+    leftmost first), and a hit overlapping text already claimed is dropped.
+    Accepted spans are counted per mask in the same sweep.
+
+    Args:
+        hits: (end_index, (length, order, mask, value)) pairs from Automaton.iter.
+        text_length: Length of the scanned text.
+
+    Returns:
+        Tuple of (spans, statistics_dict). spans is a list of
+        (start, end, mask) tuples sorted by start, end exclusive.
+    """
+    candidates = sorted(
+        (-length, order, end - length + 1, end + 1, mask)
+        for end, (length, order, mask, _) in hits
+    )
+
+    occupied = bytearray(text_length)
+    spans = []
+    stats = {}
+    for _, _, start, end, mask in candidates:
+        if occupied.find(1, start, end) != -1:
+            continue
+        occupied[start:end] = b"\x01" * (end - start)
+        spans.append((start, end, mask))
+        stats[mask] = stats.get(mask, 0) + 1
+    spans.sort()
+    return spans, stats
 
-            # Escape special regex characters
-            escaped_value = re.escape(value)
-            patterns.append((escaped_value, mask, len(value)))
 
-    # Sort by length descending to handle overlapping matches
-    # (e.g., "John Smith" should be redacted before "John")
-    patterns.sort(key=lambda x: x[2], reverse=True)
+def _iter_redacted_chunks(
+    text: str, spans: List[Tuple[int, int, str]]
+) -> Iterator[str]:
+    """
+    Yield the redacted text piece by piece, copying each untouched slice
+    exactly once.
 
-    logger.info(f"Prepared {len(patterns)} redaction patterns")
-    return patterns
+    Args:
+        text: Original text.
+        spans: Sorted, non-overlapping (start, end, mask) tuples.
+
+    Yields:
+        Alternating untouched slices and masks, in document order.
+    """
+    cursor = 0
+    for start, end, mask in spans:
+        yield text[cursor:start]
+        yield mask
+        cursor = end
+    yield text[cursor:]
 
 
 def perform_redaction(
-    text: str, patterns: List[Tuple[str, str, int]], case_sensitive: bool = False
-) -> Tuple[str, Dict[str, int]]:
+    text: str,
+    patterns: "ahocorasick.Automaton",
+    case_sensitive: bool = False,
+    output: Optional[TextIO] = None,
+) -> Tuple[Optional[str], Dict[str, int]]:
     """
-    Perform redaction on text using prepared patterns.
+    Perform redaction on text using a prepared automaton.
+
+    Overlapping matches are resolved longest value first across the whole
+    text, so "John Smith" is redacted as a whole rather than leaving "Smith"
+    behind after "John", and a longer value is never cut short by a shorter
+    one that starts earlier.
 
     Args:
         text: Text to redact.
-        patterns: List of (pattern, mask, length) tuples.
-        case_sensitive: Whether to perform case-sensitive matching.
+        patterns: Automaton built by prepare_redaction_patterns.
+        case_sensitive: Whether to perform case-sensitive matching. Must match
+            the value used to build the automaton.
+        output: Optional text stream. When given, the redacted text is written
+            to it chunk by chunk and never built in memory.
 
     Returns:
-        Tuple of (redacted_text, statistics_dict).
+        Tuple of (redacted_text, statistics_dict). redacted_text is None when
+        the result was streamed to output.
     """
-    redacted_text = text
-    stats = defaultdict(int)
-
-    flags = 0 if case_sensitive else re.IGNORECASE
+    if len(patterns):
+        scan_text = text if case_sensitive else _fold_case(text)
+        hits = patterns.iter(scan_text)
+    else:
+        # An empty pyahocorasick automaton is never built and refuses to iter
+        hits = ()
+    spans, stats = _resolve_spans(hits, len(text))
 
-    for pattern, mask, _ in patterns:
-        matches = list(re.finditer(pattern, redacted_text, flags=flags))
-        if matches:
-            # Replace from end to start to preserve indices
-            for match in reversed(matches):
-                redacted_text = (
-                    redacted_text[: match.start()] + mask + redacted_text[match.end() :]
-                )
-                stats[mask] += 1
+    if output is not None:
+        output.writelines(_iter_redacted_chunks(text, spans))
+        redacted_text = None
+    else:
+        redacted_text = "".join(_iter_redacted_chunks(text, spans))
 
-    logger.info(f"Redaction complete. Statistics: {dict(stats)}")
-    return redacted_text, dict(stats)
+    logger.info(f"Redaction complete. Statistics: {stats}")
+    return redacted_text, stats
 
 
 def redaction(
@@ -161,7 +338,8 @@ def redaction(
     output_dir: str = "results",
     case_sensitive: bool = False,
     save_stats: bool = True,
-) -> Tuple[str, Dict[str, int]]:
+    return_text: bool = True,
+) -> Tuple[Optional[str], Dict[str, int]]:
     """
     Select the prompt for a given document, clean it,
     generate a redacted version, and save it to results/.
@@ -173,9 +351,12 @@ def redaction(
         output_dir: Directory to save the redacted file (default: "results").
         case_sensitive: Whether to perform case-sensitive redaction (default: False).
         save_stats: Whether to save redaction statistics to a JSON file (default: True).
+        return_text: Whether to also return the redacted text (default: True).
+            When False, the redacted document is streamed straight to disk.
 
     Returns:
-        Tuple of (redacted_text, statistics_dict).
+        Tuple of (redacted_text, statistics_dict). redacted_text is None when
+        return_text is False.
 
     Raises:
         FileNotFoundError: If input files are not found.
@@ -186,19 +367,14 @@ def redaction(
     output_path_obj.mkdir(parents=True, exist_ok=True)
     logger.info(f"Output directory: {output_path_obj.absolute()}")
 
-    # 1. Read input documents
-    logger.info(f"Reading input document from {input_file_path}")
-    documents_df = read_input_document(file_path=input_file_path)
-
-    # 2. Load prompt JSON
+    # 1. Load prompt JSON
     prompt_data = load_prompt_data(prompt_path)
 
-    # 3. Validate inputs
-    validate_inputs(document_name, documents_df, prompt_data)
-
-    # 4. Extract document text
-    doc_row = documents_df[documents_df["name"] == document_name]
-    document_text = doc_row["content"].iloc[0]
+    # 2-4. Stream input documents, validate inputs and extract document text;
+    # rows after the requested document are never read
+    logger.info(f"Reading input document from {input_file_path}")
+    with closing(iter_input_documents(input_file_path)) as documents:
+        document_text = validate_inputs(document_name, documents, prompt_data)
 
     if not document_text or not isinstance(document_text, str):
         raise ValueError(f"Document '{document_name}' has invalid or empty content.")
@@ -213,36 +389,41 @@ def redaction(
     prompt_config = prompt_data[document_name]
 
     # 7. Prepare redaction patterns
-    patterns = prepare_redaction_patterns(prompt_config)
+    patterns = prepare_redaction_patterns(prompt_config, case_sensitive)
 
-    if not patterns:
-        logger.warning("No redaction patterns found. Returning original text.")
-        redacted_text = clean_text
-        stats = {}
-    else:
-        # 8. Perform redaction
-        redacted_text, stats = perform_redaction(clean_text, patterns, case_sensitive)
-
-    # 9. Save redacted document
+    # 8. Perform redaction and save the redacted document
     output_file = output_path_obj / f"{document_name}_redacted.txt"
     with open(output_file, "w", encoding="utf-8") as f:
-        f.write(redacted_text)
+        if not patterns:
+            logger.warning("No redaction patterns found. Returning original text.")
+            f.write(clean_text)
+            redacted_text = clean_text if return_text else None
+            stats = {}
+        else:
+            redacted_text, stats = perform_redaction(
+                clean_text,
+                patterns,
+                case_sensitive,
+                output=None if return_text else f,
+            )
+            if redacted_text is not None:
+                f.write(redacted_text)
 
     logger.info(f"✓ Redacted file saved at: {output_file.absolute()}")
 
-    # 10. Save statistics if requested
+    # 9. Save statistics if requested
     if save_stats and stats:
         stats_file = output_path_obj / f"{document_name}_redaction_stats.json"
-        with open(stats_file, "w", encoding="utf-8") as f:
-            json.dump(
+        stats_file.write_bytes(
+            orjson.dumps(
                 {
                     "document_name": document_name,
                     "statistics": stats,
                     "total_redactions": sum(stats.values()),
                 },
-                f,
-                indent=2,
+                option=orjson.OPT_INDENT_2,
             )
+        )
         logger.info(f"✓ Statistics saved at: {stats_file.absolute()}")
 
     return redacted_text, stats
@@ -308,13 +489,14 @@ Examples:
     logging.getLogger().setLevel(getattr(logging, args.log_level))
 
     try:
-        redacted_text, stats = redaction(
+        _, stats = redaction(
             prompt_path=args.prompt,
             document_name=args.document,
             input_file_path=args.input,
             output_dir=args.output,
             case_sensitive=args.case_sensitive,
             save_stats=not args.no_stats,
+            return_text=False,
         )
 
         # Print summary
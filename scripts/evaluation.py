@@ -6,88 +6,92 @@ from typing import Dict, List, Tuple
 PII_DATA = Dict[str, Dict[str, List[str]]]
 
 from typing import Dict, List, Any, Set
-from collections import defaultdict
 import numpy as np
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 
-def calculate_pii_metrics(
-    predictions: Dict, ground_truth: Dict, test_name: str = None
-) -> Dict[str, Any]:
+def _precision_recall_f1(
+    tp: np.ndarray, fp: np.ndarray, fn: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Calculate comprehensive PII extraction metrics with per-category and aggregate reporting.
+    Vectorised precision, recall and F1 for parallel arrays of counts.
+    Zero denominators score 0.0 instead of dividing by zero.
     """
+    precision = tp / np.maximum(tp + fp, 1)
+    recall = tp / np.maximum(tp + fn, 1)
+    denominator = precision + recall
+    f1 = np.divide(
+        2 * precision * recall,
+        denominator,
+        out=np.zeros_like(denominator),
+        where=denominator > 0,
+    )
+    return precision, recall, f1
+
 
-    def flatten_entities(data: Dict, test_filter: str = None) -> Dict[str, List[str]]:
-        flattened = defaultdict(list)
-        for test_key, test_data in data.items():
-            if test_filter and test_key != test_filter:
-                continue
-            for category, entities in test_data.items():
-                flattened[category].extend(
-                    entities if isinstance(entities, list) else [entities]
-                )
-        return dict(flattened)
-
-    def calculate_category_metrics(
-        pred_entities: List[str], true_entities: List[str]
-    ) -> Dict[str, float]:
-        pred_set, true_set = set(pred_entities), set(true_entities)
-
-        if not pred_set and not true_set:
-            return {
-                "precision": 1.0,
-                "recall": 1.0,
-                "f1": 1.0,
-                "tp": 0,
-                "fp": 0,
-                "fn": 0,
-                "support": 0,
-            }
-        if not pred_set:
-            return {
-                "precision": 0.0,
-                "recall": 0.0,
-                "f1": 0.0,
-                "tp": 0,
-                "fp": 0,
-                "fn": len(true_set),
-                "support": len(true_set),
-            }
-        if not true_set:
-            return {
-                "precision": 0.0,
-                "recall": 0.0,
-                "f1": 0.0,
-                "tp": 0,
-                "fp": len(pred_set),
-                "fn": 0,
-                "support": 0,
-            }
-
-        TP = len(pred_set & true_set)
-        FP = len(pred_set - true_set)
-        FN = len(true_set - pred_set)
-
-        precision = TP / (TP + FP) if (TP + FP) > 0 else 0.0
-        recall = TP / (TP + FN) if (TP + FN) > 0 else 0.0
-        f1 = (
-            2 * precision * recall / (precision + recall)
-            if (precision + recall) > 0
-            else 0.0
+def _round4(values: np.ndarray) -> List[float]:
+    """Round metric values to 4 decimals the way the reports always have."""
+    return [round(value, 4) for value in values.tolist()]
+
+
+def _metric_records(
+    names: List[str],
+    precision: np.ndarray,
+    recall: np.ndarray,
+    f1: np.ndarray,
+    tp: np.ndarray,
+    fp: np.ndarray,
+    fn: np.ndarray,
+    support: np.ndarray,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Build {name: metrics} report dicts from parallel metric arrays.
+    """
+    return {
+        name: {
+            "precision": p,
+            "recall": r,
+            "f1": f,
+            "tp": t,
+            "fp": false_pos,
+            "fn": false_neg,
+            "support": s,
+        }
+        for name, p, r, f, t, false_pos, false_neg, s in zip(
+            names,
+            _round4(precision),
+            _round4(recall),
+            _round4(f1),
+            tp.tolist(),
+            fp.tolist(),
+            fn.tolist(),
+            support.tolist(),
         )
+    }
+
 
-        return {
-            "precision": round(precision, 4),
-            "recall": round(recall, 4),
-            "f1": round(f1, 4),
-            "tp": TP,
-            "fp": FP,
-            "fn": FN,
-            "support": len(true_set),
+def _entities_by_test(data: Dict) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Normalise a {test: {category: entities}} mapping once, wrapping any
+    single entity value in a list.
+    """
+    return {
+        test_key: {
+            category: entities if isinstance(entities, list) else [entities]
+            for category, entities in test_data.items()
         }
+        for test_key, test_data in data.items()
+    }
+
+
+def calculate_pii_metrics(
+    predictions: Dict, ground_truth: Dict, test_name: str = None
+) -> Dict[str, Any]:
+    """
+    Calculate comprehensive PII extraction metrics with per-category and aggregate reporting.
+    """
 
     available_tests = set(predictions.keys()) & set(ground_truth.keys())
     if test_name and test_name not in available_tests:
@@ -97,63 +101,86 @@ def calculate_pii_metrics(
 
     tests_to_evaluate = [test_name] if test_name else list(available_tests)
 
-    all_results = {}
-    overall_metrics = defaultdict(lambda: {"tp": 0, "fp": 0, "fn": 0, "support": 0})
+    pred_by_test = _entities_by_test(predictions)
+    truth_by_test = _entities_by_test(ground_truth)
 
+    # Count TP/FP/FN for every (test, category) pair with set ops, then score
+    # all pairs at once
+    rows = []
+    counts = []
+    test_slices = []
     for test in tests_to_evaluate:
-        pred_flat = flatten_entities(predictions, test)
-        truth_flat = flatten_entities(ground_truth, test)
+        start = len(rows)
+        pred_flat = pred_by_test[test]
+        truth_flat = truth_by_test[test]
         all_categories = set(pred_flat.keys()) | set(truth_flat.keys())
 
-        test_results = {}
         for category in sorted(all_categories):
-            metrics = calculate_category_metrics(
-                pred_flat.get(category, []), truth_flat.get(category, [])
-            )
-            test_results[category] = metrics
-            for key in ["tp", "fp", "fn"]:
-                overall_metrics[category][key] += metrics[key]
-            overall_metrics[category]["support"] += metrics["support"]
-
-        all_results[test] = test_results
-
-    # Calculate overall metrics
-    overall_results = {}
-    for category, counts in overall_metrics.items():
-        tp, fp, fn = counts["tp"], counts["fp"], counts["fn"]
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
-        f1 = (
-            2 * precision * recall / (precision + recall)
-            if (precision + recall) > 0
-            else 0.0
-        )
+            pred_set = set(pred_flat.get(category, []))
+            true_set = set(truth_flat.get(category, []))
+            tp = len(pred_set & true_set)
+            rows.append((test, category))
+            counts.append((tp, len(pred_set) - tp, len(true_set) - tp))
+        test_slices.append((test, slice(start, len(rows))))
+
+    # Columns are parallel arrays with one entry per (test, category) row
+    tp, fp, fn = np.array(counts, dtype=np.int64).reshape(-1, 3).T
+    support = tp + fn
+    precision, recall, f1 = _precision_recall_f1(tp, fp, fn)
+    # A category with nothing predicted and nothing expected is a perfect score
+    nothing_to_find = (tp + fp + fn) == 0
+    precision, recall, f1 = (
+        np.where(nothing_to_find, 1.0, metric) for metric in (precision, recall, f1)
+    )
 
-        overall_results[category] = {
-            "precision": round(precision, 4),
-            "recall": round(recall, 4),
-            "f1": round(f1, 4),
-            "tp": tp,
-            "fp": fp,
-            "fn": fn,
-            "support": counts["support"],
-        }
+    # Calculate overall metrics, summing counts per category across tests
+    categories = list(dict.fromkeys(category for _, category in rows))
+    category_index = {category: i for i, category in enumerate(categories)}
+    row_category = np.array(
+        [category_index[category] for _, category in rows], dtype=np.int64
+    )
+    overall_tp, overall_fp, overall_fn, overall_support = (
+        np.bincount(row_category, weights=column, minlength=len(categories)).astype(
+            np.int64
+        )
+        for column in (tp, fp, fn, support)
+    )
+    overall_precision, overall_recall, overall_f1 = _precision_recall_f1(
+        overall_tp, overall_fp, overall_fn
+    )
 
     # Calculate micro and macro averages
-    micro_tp = sum(m["tp"] for m in overall_results.values())
-    micro_fp = sum(m["fp"] for m in overall_results.values())
-    micro_fn = sum(m["fn"] for m in overall_results.values())
-
-    micro_precision = (
-        micro_tp / (micro_tp + micro_fp) if (micro_tp + micro_fp) > 0 else 0.0
+    micro_counts = (
+        np.array([column.sum()]) for column in (overall_tp, overall_fp, overall_fn)
     )
-    micro_recall = (
-        micro_tp / (micro_tp + micro_fn) if (micro_tp + micro_fn) > 0 else 0.0
+    micro_precision, micro_recall, micro_f1 = (
+        round(metric.item(), 4) for metric in _precision_recall_f1(*micro_counts)
     )
-    micro_f1 = (
-        2 * micro_precision * micro_recall / (micro_precision + micro_recall)
-        if (micro_precision + micro_recall) > 0
-        else 0.0
+    macro_precision, macro_recall, macro_f1 = (
+        round(np.mean(_round4(metric)), 4)
+        for metric in (overall_precision, overall_recall, overall_f1)
+    )
+
+    # Report dicts are only built here, at the output boundary
+    all_results = {}
+    for test, test_rows in test_slices:
+        all_results[test] = _metric_records(
+            [category for _, category in rows[test_rows]],
+            *(
+                column[test_rows]
+                for column in (precision, recall, f1, tp, fp, fn, support)
+            ),
+        )
+
+    overall_results = _metric_records(
+        categories,
+        overall_precision,
+        overall_recall,
+        overall_f1,
+        overall_tp,
+        overall_fp,
+        overall_fn,
+        overall_support,
     )
 
     return {
@@ -161,18 +188,14 @@ def calculate_pii_metrics(
         "overall_per_category": overall_results,
         "summary": {
             "micro": {
-                "precision": round(micro_precision, 4),
-                "recall": round(micro_recall, 4),
-                "f1": round(micro_f1, 4),
+                "precision": micro_precision,
+                "recall": micro_recall,
+                "f1": micro_f1,
             },
             "macro": {
-                "precision": round(
-                    np.mean([m["precision"] for m in overall_results.values()]), 4
-                ),
-                "recall": round(
-                    np.mean([m["recall"] for m in overall_results.values()]), 4
-                ),
-                "f1": round(np.mean([m["f1"] for m in overall_results.values()]), 4),
+                "precision": macro_precision,
+                "recall": macro_recall,
+                "f1": macro_f1,
             },
             "total_tests": len(tests_to_evaluate),
             "total_categories": len(overall_results),
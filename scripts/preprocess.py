@@ -1,31 +1,68 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+# Below this many documents, starting worker processes costs more than it saves
+PARALLEL_CLEAN_MIN_DOCUMENTS = 64
+
+# Cleanup pattern, compiled once at import rather than looked up on every call.
+# The whole document is cleaned in one scan; alternatives are tried in order:
+#   <START OF DOCUMENT:...> | <END OF DOCUMENT> tags
+#   paragraph IDs such as [Par-fe9b83399b]: plus trailing whitespace, which
+#     also covers document tags inside that whitespace: the old cleaner removed
+#     tags first, so the ID's \s* ran on across where they had been
+#   escaped hyphens (\\-), also when split by bold markers as in \\**-
+#   ** bold markers
+#   runs of whitespace, including newlines
+_CLEANUP = re.compile(
+    r'<START OF DOCUMENT:.*?>\n?|\n?<END OF DOCUMENT>'
+    r'|\[Par-[a-f0-9]+\]:(?:\s|<START OF DOCUMENT:.*?>|<END OF DOCUMENT>)*'
+    r'|(?P<hyphen>\\(?:\*\*)*-)'
+    r'|\*\*'
+    r'|(?P<space>\s+)',
+    re.DOTALL,
+)
+
 
 def clean_document_for_llm(raw_document_text: str) -> str:
     """
     Cleans a structured document string by removing metadata tags,
     formatting, and normalizing whitespace, preparing it for LLM input.
     """
-    
-    # 1. Remove Document Start/End Tags and Extra Whitespace
-    # Pattern: <START OF DOCUMENT:...> | <END OF DOCUMENT>
-    cleaned_text = re.sub(r'<START OF DOCUMENT:.*?>\n?|\n?<END OF DOCUMENT>', '', raw_document_text, flags=re.DOTALL)
-    
-    # 2. Remove Paragraph IDs (e.g., [Par-fe9b83399b]:)
-    # Pattern: [Par- followed by any alphanumeric/hyphen characters and ending with a colon and space
-    cleaned_text = re.sub(r'\[Par-[a-f0-9]+\]:\s*', '', cleaned_text)
-    
-    # 3. Remove Markdown Bold and Escaped Hyphens
-    # Remove ** bolding
-    cleaned_text = cleaned_text.replace('**', '')
-    # Fix escaped hyphens (\\-) often used in phone numbers in this dataset
-    cleaned_text = cleaned_text.replace('\\-', '-')
-    
-    # 4. Remove excessive newlines and normalize spaces
-    # Replace multiple newlines with a single space to create a continuous text flow
-    cleaned_text = re.sub(r'\n\s*\n', ' ', cleaned_text) 
-    # Replace remaining single newlines with a space
-    cleaned_text = cleaned_text.replace('\n', ' ')
-    # Normalize multiple spaces to a single space
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-    
-    return cleaned_text
\ No newline at end of file
+    # Input offset up to which the output so far ends in a space. Markup is
+    # dropped between whitespace runs, so a run that starts right where the
+    # last one (plus any dropped markup) ended must not add a second space.
+    space_until = -1
+
+    def replace(match: re.Match) -> str:
+        nonlocal space_until
+        kind = match.lastgroup
+
+        # 1. Fix escaped hyphens (\\-) often used in phone numbers in this dataset
+        if kind == 'hyphen':
+            return '-'
+
+        adjacent = match.start() == space_until
+        if kind == 'space' or adjacent:
+            space_until = match.end()
+
+        # 2. Collapse every whitespace run, newlines included, to a single space
+        if kind == 'space':
+            return '' if adjacent else ' '
+
+        # 3. Drop document tags, paragraph IDs and markdown bold
+        return ''
+
+    return _CLEANUP.sub(replace, raw_document_text).strip()
+
+
+def clean_documents(raw_documents: List[str], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Cleans a list of documents with clean_document_for_llm, spreading the work
+    over a process pool when the list is large enough to benefit from it.
+    """
+    if len(raw_documents) < PARALLEL_CLEAN_MIN_DOCUMENTS:
+        return [clean_document_for_llm(doc) for doc in raw_documents]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(clean_document_for_llm, raw_documents, chunksize=8))
@@ -1,8 +1,7 @@
-prompt_v1 = """
-You are an expert PII identification tool. Your task is to analyze the provided 
-text and extract all instances of Personally Identifiable Information (PII).
+import sys
 
-PII Categories to identify:
+# Category list shared verbatim by prompt_v1 and prompt_v2
+_PII_TAXONOMY = sys.intern("""PII Categories to identify:
 1. Name
 2. Company_Name
 3. Address
@@ -15,7 +14,28 @@ PII Categories to identify:
 10. Reference_Number
 11. ID_Number
 12. Date_of_Birth
+""")
+
+# Category list with examples shared verbatim by prompt_v5 and prompt_v6
+_PII_EXAMPLES = sys.intern("""- Name: "John Smith", "Dr. O'Malley", "Mr. Johnson"
+- Company_Name: "Google LLC", "Bank of Ireland" 
+- Date_of_Birth: "15/03/1985", "March 15, 1985", "23 August 1987"
+- Address: "123 Main St, Dublin 2", "Unit 7, Industrial Estate"
+- Email_Address: "user@company.ie", "admin@domain.com"
+- Phone_Number: "+353-1-485-2739", "+352 43 03 1"
+- PPS_Number: "8472639T", "6159287K"
+- License_Number: "AML-IE-8472639", "CA-IE-6159287"
+- Passport_Number: "P6159287", "P8472639"
+- Bank_Information: "IE64 BOFI 9073 2847 6391 52", "Sort Code: 90-73-28"
+- Reference_Number: "LU-2014-REF-08947", "C-247/25", "ECLI:EU:C:2025:542"
+- ID_Number: "19870823-1234-567", "19910315-2345-678"
+""")
 
+prompt_v1 = """
+You are an expert PII identification tool. Your task is to analyze the provided 
+text and extract all instances of Personally Identifiable Information (PII).
+
+""" + _PII_TAXONOMY + """
 Output must be a single JSON object. The keys must be the PII categories, and 
 the value must be a list of all detected instances. If a category is not found, 
 its list should be empty.
@@ -24,20 +44,7 @@ prompt_v2 = """
 You are an expert PII identification tool for legal documents. Your task is to analyze 
 the provided text and extract all instances of Personally Identifiable Information (PII). 
 
-PII Categories to identify:
-1. Name
-2. Company_Name
-3. Address
-4. PPS_Number
-5. License_Number
-6. Phone_Number
-7. Email_Address
-8. Passport_Number
-9. Bank_Information
-10. Reference_Number
-11. ID_Number
-12. Date_of_Birth
-
+""" + _PII_TAXONOMY + """
 Do not generate any conversational text, explanations, or analysis. For each entity, 
 return the exact text, the assigned type, the character start index, and the character 
 end index (exclusive). Do not miss partial matches or embedded entities. Output must be 
@@ -113,19 +120,7 @@ input text.
 
 You must identify the following PII categories:
 
-- Name: "John Smith", "Dr. O'Malley", "Mr. Johnson"
-- Company_Name: "Google LLC", "Bank of Ireland" 
-- Date_of_Birth: "15/03/1985", "March 15, 1985", "23 August 1987"
-- Address: "123 Main St, Dublin 2", "Unit 7, Industrial Estate"
-- Email_Address: "user@company.ie", "admin@domain.com"
-- Phone_Number: "+353-1-485-2739", "+352 43 03 1"
-- PPS_Number: "8472639T", "6159287K"
-- License_Number: "AML-IE-8472639", "CA-IE-6159287"
-- Passport_Number: "P6159287", "P8472639"
-- Bank_Information: "IE64 BOFI 9073 2847 6391 52", "Sort Code: 90-73-28"
-- Reference_Number: "LU-2014-REF-08947", "C-247/25", "ECLI:EU:C:2025:542"
-- ID_Number: "19870823-1234-567", "19910315-2345-678"
-
+""" + _PII_EXAMPLES + """
 Extraction Requirements:
 - Return all exact text spans, including partial names, nested entities, or embedded values.
 - Provide the character start index and character end index (exclusive) for each detected PII.
@@ -144,19 +139,7 @@ Detect, classify, and locate all Personally Identifiable Information (PII) in th
 with character-accurate spans.
 
 PII Categories (12):
-- Name: "John Smith", "Dr. O'Malley", "Mr. Johnson"
-- Company_Name: "Google LLC", "Bank of Ireland" 
-- Date_of_Birth: "15/03/1985", "March 15, 1985", "23 August 1987"
-- Address: "123 Main St, Dublin 2", "Unit 7, Industrial Estate"
-- Email_Address: "user@company.ie", "admin@domain.com"
-- Phone_Number: "+353-1-485-2739", "+352 43 03 1"
-- PPS_Number: "8472639T", "6159287K"
-- License_Number: "AML-IE-8472639", "CA-IE-6159287"
-- Passport_Number: "P6159287", "P8472639"
-- Bank_Information: "IE64 BOFI 9073 2847 6391 52", "Sort Code: 90-73-28"
-- Reference_Number: "LU-2014-REF-08947", "C-247/25", "ECLI:EU:C:2025:542"
-- ID_Number: "19870823-1234-567", "19910315-2345-678"
-
+""" + _PII_EXAMPLES + """
 Extraction Requirements:
 - Extract all exact text spans, including embedded, repeated, partial, or nested PII.
 - Do not normalize, modify, correct, or infer any text. Use the raw text exactly as it appears.
@@ -256,7 +239,24 @@ STRICT MODE
 - Indices must be exact and correspond to the original input string.
 """
 
+batch_instruction = """
+
+BATCH INPUT:
+The input contains several documents, each introduced by a marker such as [[DOC_1]].
+Extract PII from each document independently. Return one entry per document in
+"documents", with "document_id" set to the marker text (e.g., DOC_1) and "pii" holding
+the PII object for that document exactly as described above.
+"""
+
+# Built once at import. get_prompt(i) returns the same interned object on every
+# call, so every request for a prompt version sends a byte-identical prefix.
+_PROMPTS = tuple(
+    sys.intern(prompt)
+    for prompt in (
+        prompt_v1, prompt_v2, prompt_v3, prompt_v4, prompt_v5, prompt_v6, prompt_v7
+    )
+)
+
 def get_prompt(index):
-    prompt_list = [prompt_v1,prompt_v2,prompt_v3,prompt_v4,prompt_v5, prompt_v6, prompt_v7]
-   
-    return prompt_list[index]
+    return _PROMPTS[index]
+
@@ -1,117 +1,121 @@
-import pandas as pd
 import re
-from collections import defaultdict
-import json
+import string
 import logging
 
+from openpyxl import load_workbook
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
-def read_input_document(file_path):
-    try:
-        # Read the file into a DataFrame
-        df = pd.read_excel(file_path, names=["name", "content"], header=None)
-        logger.info("✅ Successfully connected to and read the CSV file.")
-        logger.info("\n--- First 5 Rows ---")
-        logger.info(f"\n{df.head()}")
-        logger.info("\n--- Data Structure ---")
-        logger.info(f"\n{df.info()}")
-        return df
-    except FileNotFoundError:
-        logger.error(f"❌ Error: The file at '{file_path}' was not found.")
-        return None
-    except pd.errors.EmptyDataError:
-        logger.error("❌ Error: The file is empty.")
-        return None
+# "Test [X]" header line, compiled once at import and matched against single
+# lines that start with "Test "; Group 1 is the test name. The label format is
+# ASCII-only, so re.ASCII keeps \b on sre's cheaper ASCII checks.
+# '###Key #Value' entity lines are split with str methods in parse_document.
+_TEST_HEADER_RE = re.compile(r"[ \t]*(Test [A-Z])\b", flags=re.ASCII)
+# Characters allowed in an entity key
+_KEY_CHARS = frozenset(string.ascii_letters + "_")
 
-
-def parse_label_document(raw_data: str) -> dict:
-    """
-    Parses structured text with 'Test X' blocks and '###KEY #VALUE' pairs
-    into a nested dictionary suitable for JSON serialization.
+def iter_input_documents(file_path, verbose=False):
     """
+    Yields the (name, content) document rows from the first sheet of an Excel file.
 
-    # 1. Define the Regex Pattern
-    # Captures the key (Group 1) and the value (Group 2)
-    # Handles structures like '###Name #Value' and '###Na   me #Value'
-    entity_pattern = re.compile(r"^\s*#+([A-Za-z_]+)\s*#\s*(.+)", flags=re.MULTILINE)
+    The workbook is opened in read-only mode and rows are streamed from the
+    sheet XML one at a time, so callers can stop early or start work before
+    the whole sheet has been read. The sheet has no header row; every
+    non-empty row is a document.
 
-    # 2. Split the data by "Test [X]" headers to isolate each block.
-    test_blocks = re.split(r"(Test [A-Z])\s*\n?", raw_data.strip())
+    Args:
+        file_path: Path to the Excel file.
+        verbose: Log the first rows read, for a quick sanity check.
 
-    # Remove the first element if it's empty (which happens if the data starts with a Test ID)
-    if test_blocks and test_blocks[0].strip() == "":
-        test_blocks.pop(0)
+    Yields:
+        (name, content) tuples.
 
-    parsed_data = {}
-    current_test_id = None
-
-    # 3. Iterate and Extract
-    for i, block in enumerate(test_blocks):
-        if i % 2 == 0:
-            # This block is the Test ID (e.g., "Test A", "Test C")
-            current_test_id = block.strip()
-            parsed_data[current_test_id] = defaultdict(list)
-        else:
-            # This block is the content for the current_test_id
-            if current_test_id is None:
+    Raises:
+        FileNotFoundError: If the file does not exist (on first iteration).
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if verbose:
+            logger.info("\n--- First 5 Rows ---")
+        count = 0
+        for name, content in workbook.active.iter_rows(
+            min_row=1, max_col=2, values_only=True
+        ):
+            if name is None and content is None:
                 continue
+            if verbose and count < 5:
+                logger.info(f"{name}: {str(content)[:80]!r}")
+            count += 1
+            yield name, content
+    finally:
+        workbook.close()
 
-            # Iterate over all matches within the content block
-            for match in entity_pattern.finditer(block):
-                field_key = match.group(1).strip()
-                value = match.group(2).strip()
 
-                # Append the value to the list for the corresponding key
-                parsed_data[current_test_id][field_key].append(value)
+def read_input_document(file_path, verbose=False):
+    """
+    Reads every (name, content) document row from an Excel file.
 
-    # 4. Convert defaultdicts back to regular dicts
-    final_data = {test_id: dict(data) for test_id, data in parsed_data.items()}
+    Args:
+        file_path: Path to the Excel file.
+        verbose: Log the first rows read, for a quick sanity check.
+
+    Returns:
+        List of (name, content) tuples, or None if the file could not be read.
+    """
+    try:
+        documents = list(iter_input_documents(file_path, verbose=verbose))
+    except FileNotFoundError:
+        logger.error(f"❌ Error: The file at '{file_path}' was not found.")
+        return None
+
+    if not documents:
+        logger.error("❌ Error: The file is empty.")
+        return None
+
+    logger.info(f"✅ Successfully read {len(documents)} documents from '{file_path}'.")
+    return documents
 
-    return final_data
 
-def parse_document_to_json(raw_data: str) -> dict:
+def parse_document(raw_data: str) -> dict:
     """
     Parses structured text with 'Test X' blocks and '###KEY #VALUE' pairs
     into a nested dictionary suitable for JSON serialization.
     """
 
-    # Regex to capture the field key and value from lines like '###Name #Orval O'Riocht'
-    # Group 1: The key (e.g., Name, Company_Name). Handles irregular spacing like 'Na   me' in Test F.
-    # Group 2: The value (the rest of the line).
-    entity_pattern = re.compile(r"^\s*#+([A-Za-z_]+)\s*#\s*(.+)", flags=re.MULTILINE)
-
-    # Split the data by "Test [X]" to isolate each block.
-    # The split includes the delimiter (Test ID) in the results.
-    test_blocks = re.split(r"(Test [A-Z])\s*\n?", raw_data.strip())
-
-    # Remove the first element if it's empty (which happens if the data starts with "Test A")
-    if test_blocks and test_blocks[0].strip() == "":
-        test_blocks.pop(0)
-
     parsed_data = {}
-    current_test_id = None
-
-    # Iterate through blocks (which alternate between Test ID and block content)
-    for i, block in enumerate(test_blocks):
-        if i % 2 == 0:
-            # This block is the Test ID (e.g., "Test A", "Test C")
-            current_test_id = block.strip()
-            parsed_data[current_test_id] = defaultdict(list)
-        else:
-            # This block is the content for the current_test_id
-            if current_test_id is None:
-                continue
-
-            # Iterate over all matches within the content block
-            for match in entity_pattern.finditer(block):
-                field_key = match.group(1).strip()
-                value = match.group(2).strip()
-
-                # Append the value to the list for the corresponding key
-                parsed_data[current_test_id][field_key].append(value)
-
-    # Convert defaultdicts back to regular dicts for final JSON structure
-    final_data = {test_id: dict(data) for test_id, data in parsed_data.items()}
-
-    return final_data
+    current_test = None
+
+    # Walk headers and entities in document order; entities attach to the
+    # most recent "Test [X]" header, and any before the first header are ignored
+    for line in raw_data.split("\n"):
+        stripped = line.lstrip(" \t")
+
+        if stripped.startswith("#"):
+            # '###Key #Value' line: an ASCII key, optional spaces, '#', then a
+            # non-empty remainder
+            key_part, marker, value = stripped.lstrip("#").partition("#")
+            field_key = key_part.rstrip(" \t")
+            if (
+                marker
+                and value
+                and field_key
+                and _KEY_CHARS.issuperset(field_key)
+                and current_test is not None
+            ):
+                current_test.setdefault(field_key, []).append(value.strip())
+            continue
+
+        if not stripped.startswith("Test "):
+            continue
+
+        # Headers are rare; let the pattern decide what counts as one
+        match = _TEST_HEADER_RE.match(line)
+        if match:
+            current_test = parsed_data[match.group(1)] = {}
+
+    return parsed_data
+
+
+# Older names, kept for existing callers; all three parse the same format
+parse_label_document = parse_document_to_json = parse_document
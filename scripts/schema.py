@@ -1,9 +1,13 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List
 
 
 class PIIExtractionOutput(BaseModel):
-  
+
+    # Validated extractions are read-only: assigning to a field raises instead of
+    # silently diverging from the response that was validated
+    model_config = ConfigDict(frozen=True)
+
     Name: List[str] = Field(
         default_factory=list,
         description="Full names, partial names, or titles (e.g., Orval O'Riocht, Mr. Shingali).",
@@ -48,4 +52,29 @@ class PIIExtractionOutput(BaseModel):
     Reference_Number: List[str] = Field(
         default_factory=list,
         description="Any unique legal, tax, employer, or case reference number (e.g., RC-RB-2025-847263, C-247/25).",
-    )
\ No newline at end of file
+    )
+
+
+class PIIDocumentExtraction(BaseModel):
+
+    document_id: str = Field(
+        description="Identifier of the document, exactly as given in its [[...]] marker (e.g., DOC_1).",
+    )
+    pii: PIIExtractionOutput = Field(
+        default_factory=PIIExtractionOutput,
+        description="PII extracted from this document.",
+    )
+
+
+class PIIBatchExtractionOutput(BaseModel):
+
+    documents: List[PIIDocumentExtraction] = Field(
+        default_factory=list,
+        description="One entry per input document.",
+    )
+
+
+# JSON schemas sent as the Gemini response schema. Generated once at import so
+# every request reuses the same dict instead of re-running schema generation.
+PII_SCHEMA: dict = PIIExtractionOutput.model_json_schema()
+PII_BATCH_SCHEMA: dict = PIIBatchExtractionOutput.model_json_schema()
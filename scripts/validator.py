@@ -1,23 +1,44 @@
-from urllib import response
+import orjson
+from pydantic import TypeAdapter
 from scripts.schema import PIIExtractionOutput
 import logging
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Built once: the validator and serializer are compiled a single time, not per response
+_ADAPTER = TypeAdapter(PIIExtractionOutput)
+
+def dump_output(pii_data_model: PIIExtractionOutput, pretty: bool = False) -> bytes:
+    """
+    Serializes a validated model to UTF-8 JSON bytes.
+
+    Bytes can be written straight to a binary file or socket; callers that need
+    text decode at the edge. Compact by default, indented when pretty is set.
+    """
+    option = orjson.OPT_INDENT_2 if pretty else 0
+    return orjson.dumps(_ADAPTER.dump_python(pii_data_model), option=option)
+
+
 def validate_output(response_text):
+    """
+    Validates a raw model response against PIIExtractionOutput.
+
+    Returns the validated model, or None if the response violates the schema.
+    Callers that need JSON serialize the model once, with dump_output.
+    """
     try:
-        # Use model_validate_json to validate the JSON string and instantiate the Pydantic model
-        pii_data_model = PIIExtractionOutput.model_validate_json(response_text)
+        # Validate the JSON string and instantiate the Pydantic model
+        pii_data_model = _ADAPTER.validate_json(response_text)
 
-        logger.info("\n✅ Pydantic Validation Successful!")
-        logger.info("\n--- Structured PII Data (Python Object) ---")
+        logger.debug("\n✅ Pydantic Validation Successful!")
 
-        # Use model_dump_json for a clean, indented printout of the validated data
-        validated_data = pii_data_model.model_dump_json(indent=2)
-        logger.info(validated_data)
+        # Only serialize the validated data when someone will read it
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n--- Structured PII Data (Python Object) ---")
+            logger.debug(dump_output(pii_data_model, pretty=True).decode())
 
-        return validated_data
+        return pii_data_model
 
     except Exception as e:
         logger.error(f"\n❌ Pydantic Validation Failed! Error: {e}")
@@ -0,0 +1,101 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from scripts.schema import PIIExtractionOutput
+
+PII_FIELDS = list(PIIExtractionOutput.model_fields)
+
+DOCUMENTS = [
+    ("Test_A", "Contact John Smith at john@example.com."),
+    ("Test_B", "Acme Ltd is based in Dublin 2."),
+]
+
+GROUND_TRUTH = {
+    "Test_A": {"Name": ["John Smith"], "Email_Address": ["john@example.com"]},
+    "Test_B": {"Company_Name": ["Acme Ltd"], "Address": ["Dublin 2"]},
+}
+
+
+class StubModels:
+    """Stands in for ``client.aio.models``, answering from GROUND_TRUTH."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        text = contents.removeprefix("Input Text: ")
+        name = next(name for name, clean_text in DOCUMENTS if clean_text == text)
+        return SimpleNamespace(text=json.dumps(GROUND_TRUTH[name]))
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    runner = main.PIIEvaluationRunner()
+    runner.client = SimpleNamespace(aio=SimpleNamespace(models=StubModels()))
+    return runner
+
+
+def test_run_all_evaluations_writes_metrics_and_removes_stream(runner):
+    prompt_id = 6
+
+    all_results = asyncio.run(
+        runner.run_all_evaluations(
+            prompt_ids=[prompt_id], documents=DOCUMENTS, ground_truth=GROUND_TRUTH
+        )
+    )
+
+    assert runner.client.aio.models.calls == len(DOCUMENTS)
+    assert all_results[prompt_id]["metrics"]["summary"]["micro"]["f1"] == 1.0
+    assert (runner.results_dir / f"predictions_prompt_{prompt_id}.json").exists()
+    assert (runner.results_dir / f"metrics_prompt_{prompt_id}.json").exists()
+    stream_file = runner._stream_file(prompt_id, main.get_prompt(prompt_id))
+    assert not stream_file.exists()
+
+
+def test_parse_response_fills_every_category_and_drops_unknown_keys(runner):
+    result = runner._parse_response('{"Name": ["John Smith"], "Notes": "extra"}')
+
+    assert result == {**{field: [] for field in PII_FIELDS}, "Name": ["John Smith"]}
+
+
+@pytest.mark.parametrize(
+    "response_text",
+    [
+        '{"Name": [{"value": "John Smith", "type": "Name", "start": 8, "end": 18}]}',
+        '["John Smith"]',
+        "not json",
+    ],
+)
+def test_parse_response_turns_malformed_responses_into_errors(runner, response_text):
+    result = runner._parse_response(response_text)
+
+    assert result["status"] == "error"
+
+
+def test_one_malformed_response_only_fails_its_document(runner):
+    async def generate_content(model, contents, config):
+        if "Acme" in contents:
+            return SimpleNamespace(
+                text='{"Company_Name": [{"value": "Acme Ltd", "start": 0, "end": 8}]}'
+            )
+        return SimpleNamespace(text=json.dumps(GROUND_TRUTH["Test_A"]))
+
+    runner.client.aio.models.generate_content = generate_content
+
+    all_results = asyncio.run(
+        runner.run_all_evaluations(
+            prompt_ids=[5], documents=DOCUMENTS, ground_truth=GROUND_TRUTH
+        )
+    )
+
+    metrics_data = all_results[5]["metrics_data"]
+    assert metrics_data["successful_documents"] == 1
+    assert metrics_data["failed_documents"] == 1
+    assert all_results[5]["metrics"]["summary"]["micro"]["f1"] == 1.0
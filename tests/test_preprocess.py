@@ -0,0 +1,52 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from scripts.preprocess import clean_document_for_llm
+from scripts.read_file import read_input_document
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def reference_clean(raw_document_text: str) -> str:
+    """The original four-step cleaner, kept to check the single-pass version against."""
+    cleaned_text = re.sub(
+        r'<START OF DOCUMENT:.*?>\n?|\n?<END OF DOCUMENT>', '', raw_document_text, flags=re.DOTALL
+    )
+    cleaned_text = re.sub(r'\[Par-[a-f0-9]+\]:\s*', '', cleaned_text)
+    cleaned_text = cleaned_text.replace('**', '')
+    cleaned_text = cleaned_text.replace('\\-', '-')
+    cleaned_text = re.sub(r'\n\s*\n', ' ', cleaned_text)
+    cleaned_text = cleaned_text.replace('\n', ' ')
+    return re.sub(r'\s+', ' ', cleaned_text).strip()
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        # Whitespace after a tag that follows a paragraph ID is absorbed by the ID
+        '>[Par-ab12]: \t <START OF DOCUMENT: x>\n  aa',
+        '<[Par-ff]:\n<START OF DOCUMENT: x>\n b\tb',
+        '[Par-ab12]: <END OF DOCUMENT> <START OF DOCUMENT: y>\n  a',
+        'a [Par-ab12]:\n\n<END OF DOCUMENT>',
+        # Markup between whitespace runs leaves a single space
+        'a ** b',
+        'a \n<END OF DOCUMENT> \n [Par-ff]: b',
+        'x\n\n  **y**  \n',
+        # Escaped hyphens, also split by bold markers
+        '+353\\-1\\-485 and \\**-2739',
+        '<START OF DOCUMENT: Test_A.docx AltName:Source >\n'
+        '[Par-fe9b83399b]: **BUSINESS PLAN**\n\n'
+        '[Par-0a1b2c]: Call   +353\\-1\\-485\\-2739.\n<END OF DOCUMENT>',
+    ],
+)
+def test_matches_reference_cleaner(raw):
+    assert clean_document_for_llm(raw) == reference_clean(raw)
+
+
+def test_matches_reference_cleaner_on_sample_documents():
+    documents = read_input_document(DATA_DIR / "documents.xlsx")
+
+    for _, content in documents:
+        assert clean_document_for_llm(content) == reference_clean(content)
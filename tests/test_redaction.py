@@ -0,0 +1,102 @@
+import io
+import re
+
+import pytest
+
+import redaction
+from redaction import perform_redaction, prepare_redaction_patterns
+
+
+@pytest.fixture(params=["ahocorasick", "fallback"])
+def backend(request, monkeypatch):
+    """Run each test against pyahocorasick and the regex fallback."""
+    if request.param == "fallback":
+        monkeypatch.setattr(redaction, "ahocorasick", None)
+    elif redaction.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    redaction._build_automaton.cache_clear()
+    yield request.param
+    redaction._build_automaton.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "prompt_config",
+    [{}, {"Name": []}, {"Name": ["", None]}, {"Name": "not a list"}],
+)
+def test_empty_config_returns_text_unchanged(backend, prompt_config):
+    patterns = prepare_redaction_patterns(prompt_config, case_sensitive=False)
+
+    assert perform_redaction("hello world", patterns) == ("hello world", {})
+
+
+def test_empty_config_streams_text_unchanged(backend):
+    patterns = prepare_redaction_patterns({}, case_sensitive=True)
+    output = io.StringIO()
+
+    assert perform_redaction(
+        "hello world", patterns, case_sensitive=True, output=output
+    ) == (None, {})
+    assert output.getvalue() == "hello world"
+
+
+def reference_redact(text, prompt_config):
+    """The original redactor: substitute every value in turn, longest first."""
+    patterns = sorted(
+        (
+            (value, f"<{category}_REDACTED>")
+            for category, values in prompt_config.items()
+            for value in values
+        ),
+        key=lambda pattern: len(pattern[0]),
+        reverse=True,
+    )
+    for value, mask in patterns:
+        text = re.sub(re.escape(value), mask, text, flags=re.IGNORECASE)
+    return text
+
+
+def test_redacts_longest_value_first(backend):
+    patterns = prepare_redaction_patterns(
+        {"Name": ["John", "John Smith"], "Company_Name": ["Smith Ltd"]},
+        case_sensitive=False,
+    )
+
+    redacted, stats = perform_redaction("Ask john smith Ltd.", patterns)
+
+    assert redacted == "Ask <Name_REDACTED> Ltd."
+    assert stats == {"<Name_REDACTED>": 1}
+
+
+@pytest.mark.parametrize(
+    "text, prompt_config",
+    [
+        (
+            "Ms. Fawziya Shingali (née Taalo) appeared in person.",
+            {"Name": ["Ms. Fawziya Shingali", "Fawziya Shingali (née Taalo)"]},
+        ),
+        (
+            "JUDGMENT OF THE COURT OF JUSTICE OF THE EUROPEAN UNION",
+            {
+                "Company_Name": [
+                    "THE COURT",
+                    "COURT OF JUSTICE OF THE EUROPEAN UNION",
+                ]
+            },
+        ),
+        (
+            "Orval O'Riocht and Mr. O'Riocht; O'Riocht & Sons",
+            {
+                "Name": ["O'Riocht", "Orval O'Riocht"],
+                "Company_Name": ["O'Riocht & Sons"],
+            },
+        ),
+    ],
+)
+def test_longer_overlapping_value_wins_over_earlier_shorter_one(
+    backend, text, prompt_config
+):
+    patterns = prepare_redaction_patterns(prompt_config, case_sensitive=False)
+
+    redacted, _ = perform_redaction(text, patterns)
+
+    assert redacted == reference_redact(text, prompt_config)